@@ -1,10 +1,14 @@
+import bisect
 import curses
+import dataclasses
 import re
-from typing import Optional, Tuple, Union
+from typing import List, Optional, Sequence, Tuple, Union
 
 from epy_reader.models import Direction, InlineStyle, Key, NoUpdate
 from epy_reader.settings import DoubleSpreadPadding
 
+_IMG_RE = re.compile(r"\[IMG:[0-9]+\]")
+
 
 class InfiniBoard:
     """
@@ -31,8 +35,15 @@ class InfiniBoard:
         self.x = ((self.screen_cols - self.textwidth) // 2) + 1
         self.text = text
         self.total_lines = len(text)
-        self.default_style: Tuple[InlineStyle, ...] = default_style
+        # sorted by row so only styles on visible rows have to be looked at,
+        # sorting is stable so overlapping styles on the same row keep their order
+        self.default_style: Tuple[InlineStyle, ...] = tuple(
+            sorted(default_style, key=lambda i: i.row)
+        )
+        self.default_style_rows: List[int] = [i.row for i in self.default_style]
         self.temporary_style: Tuple[InlineStyle, ...] = ()
+        self.temporary_style_rows: List[int] = []
+        self.temporary_highlight: Optional[int] = None
         self.spread = spread
 
         if self.spread == 2:
@@ -41,34 +52,61 @@ class InfiniBoard:
                 DoubleSpreadPadding.LEFT.value + self.textwidth + DoubleSpreadPadding.MIDDLE.value
             )
 
-    def feed_temporary_style(self, styles: Optional[Tuple[InlineStyle, ...]] = None) -> None:
-        """Reset styling if `styles` is None"""
+    def feed_temporary_style(
+        self, styles: Optional[Tuple[InlineStyle, ...]] = None, highlighted: Optional[int] = None
+    ) -> None:
+        """
+        Reset styling if `styles` is None.
+        `styles` has to be sorted by row, `highlighted` is index of style drawn reversed.
+        """
         self.temporary_style = styles if styles else ()
+        self.temporary_style_rows = [i.row for i in self.temporary_style]
+        self.temporary_highlight = highlighted
+
+    def highlight_temporary_style(self, index: Optional[int]) -> None:
+        """Switch reversed style to another one of `temporary_style` without copying them"""
+        self.temporary_highlight = index
 
     def render_styles(
-        self, row: int, styles: Tuple[InlineStyle, ...] = (), bottom_padding: int = 0
+        self,
+        row: int,
+        styles: Tuple[InlineStyle, ...] = (),
+        bottom_padding: int = 0,
+        style_rows: Optional[Sequence[int]] = None,
     ) -> None:
+        """
+        `style_rows` are rows of `styles` if `styles` is sorted by row,
+        used to skip straight to styles on visible rows.
+        """
+        page_rows = self.screen_rows - bottom_padding
+        # visible rows bounds, compared directly instead of building range() per style
+        page_end = row + page_rows
+        alt_page_end = row + 2 * page_rows
+        if style_rows is not None:
+            start = bisect.bisect_left(style_rows, row)
+            end = bisect.bisect_left(
+                style_rows, alt_page_end if self.spread == 2 else page_end, lo=start
+            )
+            styles = styles[start:end]
+        bkgd = self.screen.getbkgd()
         for i in styles:
-            if i.row in range(row, row + self.screen_rows - bottom_padding):
-                self.chgat(row, i.row, i.col, i.n_letters, self.screen.getbkgd() | i.attr)
+            if row <= i.row < page_end:
+                self.chgat(row, i.row, i.col, i.n_letters, bkgd | i.attr)
 
-            if self.spread == 2 and i.row in range(
-                row + self.screen_rows - bottom_padding,
-                row + 2 * (self.screen_rows - bottom_padding),
-            ):
+            if self.spread == 2 and page_end <= i.row < alt_page_end:
                 self.chgat(
                     row,
-                    i.row - (self.screen_rows - bottom_padding),
+                    i.row - page_rows,
                     -self.x + self.x_alt + i.col,
                     i.n_letters,
-                    self.screen.getbkgd() | i.attr,
+                    bkgd | i.attr,
                 )
 
     def getch(self) -> Union[NoUpdate, Key]:
         input = self.screen.getch()
         if input == -1:
             return NoUpdate()
-        return Key(input)
+        return Key.from_int(input)
 
     def getbkgd(self):
         return self.screen.getbkgd()
@@ -77,6 +115,8 @@ class InfiniBoard:
         self.screen.chgat(y - row, self.x + x, n, attr)
 
     def write(self, row: int, bottom_padding: int = 0) -> None:
+        # screen is cleared before writing, so empty lines don't need to be drawn
+        addstr = self.screen.addstr
         for n_row in range(min(self.screen_rows - bottom_padding, self.total_lines - row)):
             text_line = self.text[row + n_row]
 
@@ -88,10 +128,11 @@ class InfiniBoard:
             #
             # Since the exception is raised "after the character is printed"
             # then it seems to be safe to catch it.
-            try:
-                self.screen.addstr(n_row, self.x, text_line)
-            except curses.error:
-                pass
+            if text_line:
+                try:
+                    addstr(n_row, self.x, text_line)
+                except curses.error:
+                    pass
 
             if (
                 self.spread == 2
@@ -99,15 +140,18 @@ class InfiniBoard:
             ):
                 text_line = self.text[row + self.screen_rows - bottom_padding + n_row]
                 # TODO: clean this up
-                if re.search("\\[IMG:[0-9]+\\]", text_line):
-                    self.screen.addstr(
-                        n_row, self.x_alt, text_line.center(self.textwidth), curses.A_BOLD
-                    )
-                else:
-                    self.screen.addstr(n_row, self.x_alt, text_line)
-
-        self.render_styles(row, self.default_style, bottom_padding)
-        self.render_styles(row, self.temporary_style, bottom_padding)
+                if "[IMG:" in text_line and _IMG_RE.search(text_line):
+                    addstr(n_row, self.x_alt, text_line.center(self.textwidth), curses.A_BOLD)
+                elif text_line:
+                    addstr(n_row, self.x_alt, text_line)
+
+        self.render_styles(row, self.default_style, bottom_padding, self.default_style_rows)
+        self.render_styles(row, self.temporary_style, bottom_padding, self.temporary_style_rows)
+        if self.temporary_highlight is not None:
+            highlighted = self.temporary_style[self.temporary_highlight]
+            self.render_styles(
+                row, (dataclasses.replace(highlighted, attr=curses.A_REVERSE),), bottom_padding
+            )
         # self.screen.refresh()
 
     def write_n(
@@ -122,12 +166,12 @@ class InfiniBoard:
             text_line = self.text[row + n_row]
             if direction == Direction.FORWARD:
                 # self.screen.addnstr(n_row, self.x + self.textwidth - n, self.text[row+n_row], n)
-                # `+ " " * (self.textwidth - len(self.text[row + n_row]))` is workaround to
+                # `.ljust(self.textwidth)` is workaround to
                 # to prevent curses trace because not calling screen.clear()
                 self.screen.addnstr(
                     n_row,
                     self.x + self.textwidth - n,
-                    text_line + " " * (self.textwidth - len(text_line)),
+                    text_line.ljust(self.textwidth),
                     n,
                 )
 
@@ -139,7 +183,7 @@ class InfiniBoard:
                     self.screen.addnstr(
                         n_row,
                         self.x_alt + self.textwidth - n,
-                        text_line_alt + " " * (self.textwidth - len(text_line_alt)),
+                        text_line_alt.ljust(self.textwidth),
                         n,
                     )
 
@@ -9,17 +9,23 @@ from typing import List, Optional, Tuple
 from epy_reader import __version__
 from epy_reader.lib import coerce_to_int, is_url, truncate
 from epy_reader.models import LibraryItem
-from epy_reader.parser import parse_html
+from epy_reader.parser import HTMLtoLines, parse_html
 from epy_reader.state import State
 from epy_reader.utils import get_ebook_obj
 
+DUMP_CHUNK_SIZE = 1 << 18
+
 
 def cleanup_library(state: State) -> None:
     """Cleanup non-existent file from library"""
     library_items = state.get_from_history()
-    for item in library_items:
-        if not os.path.isfile(item.filepath) and not is_url(item.filepath):
-            state.delete_from_library(item.filepath)
+    missing_filepaths = [
+        item.filepath
+        for item in library_items
+        if not os.path.isfile(item.filepath) and not is_url(item.filepath)
+    ]
+    if missing_filepaths:
+        state.delete_many_from_library(missing_filepaths)
 
 
 def get_nth_file_from_library(state: State, n) -> Optional[LibraryItem]:
@@ -38,17 +44,26 @@ def get_matching_library_item(
     if not library_items:
         return None
 
+    pattern = pattern.lower()
     for item in library_items:
-        tomatch = f"{item.title} - {item.author}"  # item.filepath
-        match_value = sum(
-            [i.size for i in SM(None, tomatch.lower(), pattern.lower()).get_matching_blocks()]
-        ) / float(len(pattern))
+        tomatch = f"{item.title} - {item.author}".lower()  # item.filepath
+        # whole pattern found as is gives the highest possible match value
+        # without running the much slower SequenceMatcher
+        if pattern in tomatch:
+            match_value = 1.0
+        else:
+            match_value = sum(
+                [i.size for i in SM(None, tomatch, pattern).get_matching_blocks()]
+            ) / float(len(pattern))
         matches.append(
             (
                 item,
                 match_value,
             )
         )
+        # the first item with the highest match value wins, nothing after it can
+        if match_value >= 1.0:
+            break
 
     sorted_matches = sorted(matches, key=lambda x: -x[1])
     first_match_item, first_match_value = sorted_matches[0]
@@ -160,12 +175,21 @@ def dump_ebook_content(filepath: str) -> None:
             ebook.initialize()
         except Exception as e:
             sys.exit("ERROR: Badly-structured ebook.\n" + str(e))
+        # sys.stdout.reconfigure(encoding="utf-8")  # Python>=3.7
+        out = sys.stdout.buffer
+        # contents are collected and written in chunks of at least DUMP_CHUNK_SIZE bytes
+        # instead of one write per content or per line
+        buf = bytearray()
+        parser = HTMLtoLines()
         for i in ebook.contents:
-            content = ebook.get_raw_text(i)
-            src_lines = parse_html(content)
+            # raw content is not bound to a name so it can be freed right after parsing
+            src_lines = parse_html(ebook.get_raw_text(i), parser=parser)
             assert isinstance(src_lines, tuple)
-            # sys.stdout.reconfigure(encoding="utf-8")  # Python>=3.7
-            for j in src_lines:
-                sys.stdout.buffer.write((j + "\n\n").encode("utf-8"))
+            if src_lines:
+                buf += ("\n\n".join(src_lines) + "\n\n").encode("utf-8")
+            if len(buf) >= DUMP_CHUNK_SIZE:
+                out.write(buf)
+                buf.clear()
+        out.write(buf)
     finally:
         ebook.cleanup()
@@ -2,6 +2,7 @@ import dataclasses
 import json
 import os
 import sys
+from functools import cached_property
 from typing import Mapping, Tuple, Union
 
 import epy_reader.settings as settings
@@ -36,7 +37,7 @@ class Config(AppData):
         # to build help menu text
         self.keymap_user_dict = keymap_dict
 
-    @property
+    @cached_property
     def filepath(self) -> str:
         return os.path.join(self.prefix, "configuration.json") if self.prefix else os.devnull
 
@@ -68,13 +69,13 @@ class Config(AppData):
         place_new: bool = False,
     ) -> Mapping[str, Tuple[str, ...]]:
         """Returns a copy of `old_keys` after updating it with `new_keys`
-        by appending the tuple value and removes duplicate"""
+        by appending the tuple value and removes duplicate while keeping order"""
 
         result = {**old_keys}
         for k, _ in new_keys.items():
             if k in result:
-                result[k] = tuple(set(result[k] + new_keys[k]))
+                result[k] = tuple(dict.fromkeys(result[k] + new_keys[k]))
             elif place_new:
-                result[k] = tuple(set(new_keys[k]))
+                result[k] = tuple(dict.fromkeys(new_keys[k]))
 
         return result
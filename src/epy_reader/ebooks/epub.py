@@ -3,7 +3,7 @@ import os
 import xml.etree.ElementTree as ET
 import zipfile
 import zlib
-from typing import Dict, List, Optional, Sequence, Tuple, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 from urllib.parse import unquote, urljoin
 
 from epy_reader.ebooks.base import Ebook
@@ -33,13 +33,28 @@ class Epub(Ebook):
         # by calling self.initialize()
         self.root_filepath: str
         self.root_dirpath: str
+        self.content_opf: ET.ElementTree
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # zipfile.ZipFile can't be pickled, so pickle its filename
+        # and reopen it on unpickling, eg. in letters counting worker processes
+        state = self.__dict__.copy()
+        if isinstance(self.file, zipfile.ZipFile):
+            state["file"] = None
+            state["_zip_filename"] = self.file.filename
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        zip_filename = state.pop("_zip_filename", None)
+        self.__dict__.update(state)
+        if zip_filename is not None:
+            self.file = zipfile.ZipFile(zip_filename, "r")
 
     def get_meta(self) -> BookMetadata:
-        assert isinstance(self.file, zipfile.ZipFile)
         # why self.file.read(self.root_filepath) problematic
         # content_opf = ET.fromstring(self.file.open(self.root_filepath).read())
-        content_opf = ET.parse(self.file.open(self.root_filepath))
-        return Epub._get_metadata(content_opf)
+        # content.opf is already parsed by self.initialize()
+        return Epub._get_metadata(self.content_opf)
 
     @staticmethod
     def _get_metadata(content_opf: ET.ElementTree) -> BookMetadata:
@@ -54,7 +69,7 @@ class Epub(Ebook):
     @staticmethod
     def _get_contents(content_opf: ET.ElementTree) -> Tuple[str, ...]:
         # cont = ET.parse(self.file.open(self.root_filepath)).getroot()
-        manifests: List[Tuple[str, str]] = []
+        manifests: Dict[str, str] = {}
         for manifest_elem in content_opf.findall("OPF:manifest/*", Epub.NAMESPACE):
             # EPUB3
             # if manifest_elem.get("id") != "ncx" and manifest_elem.get("properties") != "nav":
@@ -66,22 +81,17 @@ class Epub(Ebook):
                 assert manifest_id is not None
                 manifest_href = manifest_elem.get("href")
                 assert manifest_href is not None
-                manifests.append((manifest_id, manifest_href))
+                manifests.setdefault(manifest_id, manifest_href)
 
-        spines: List[str] = []
         contents: List[str] = []
         for spine_elem in content_opf.findall("OPF:spine/*", Epub.NAMESPACE):
             idref = spine_elem.get("idref")
             assert idref is not None
-            spines.append(idref)
-        for spine in spines:
-            for manifest in manifests:
-                if spine == manifest[0]:
-                    # book_contents.append(root_dirpath + unquote(manifest[1]))
-                    contents.append(unquote(manifest[1]))
-                    manifests.remove(manifest)
-                    # TODO: test is break necessary
-                    break
+            # lookup manifest by id instead of scanning all manifests for each spine
+            manifest_href = manifests.get(idref)
+            if manifest_href is not None:
+                # book_contents.append(root_dirpath + unquote(manifest_href))
+                contents.append(unquote(manifest_href))
 
         return tuple(contents)
 
@@ -96,6 +106,11 @@ class Epub(Ebook):
                     "XHTML:body//XHTML:nav[@EPUB:type='toc']//XHTML:a", Epub.NAMESPACE
                 )
 
+            # first index of each content, instead of contents.index() for every navPoint
+            content_indices: Dict[str, int] = {}
+            for n, content in enumerate(contents):
+                content_indices.setdefault(content, n)
+
             toc_entries: List[TocEntry] = []
             for navPoint in navPoints:
                 if version in {"1.0", "2.0"}:
@@ -111,14 +126,13 @@ class Epub(Ebook):
                     assert src_elem is not None
                     src = src_elem.get("href")
 
-                    name = "".join(list(navPoint.itertext()))
+                    name = "".join(navPoint.itertext())
 
                 assert src is not None
                 src_id = src.split("#")
 
-                try:
-                    idx = contents.index(unquote(src_id[0]))
-                except ValueError:
+                idx = content_indices.get(unquote(src_id[0]))
+                if idx is None:
                     continue
 
                 # assert name is not None
@@ -152,6 +166,7 @@ class Epub(Ebook):
         )
 
         content_opf = ET.parse(self.file.open(self.root_filepath))
+        self.content_opf = content_opf
         version = content_opf.getroot().get("version")
 
         contents = Epub._get_contents(content_opf)
@@ -177,22 +192,24 @@ class Epub(Ebook):
         assert isinstance(self.file, zipfile.ZipFile)
         assert isinstance(content_path, str)
 
-        max_tries: Optional[int] = None  # 1 if DEBUG else None
+        max_tries = 1 if DEBUG else 3
 
         # use try-except block to catch
         # zlib.error: Error -3 while decompressing data: invalid distance too far back
         # seems like caused by multiprocessing
+        # retries are bounded so a genuinely corrupt entry raises instead of spinning forever
         tries = 0
         while True:
             try:
-                content = self.file.open(content_path).read()
+                with self.file.open(content_path) as f:
+                    content = f.read().decode("utf-8")
                 break
             except zlib.error as e:
                 tries += 1
-                if max_tries is not None and tries >= max_tries:
+                if tries >= max_tries:
                     raise e
 
-        return content.decode("utf-8")
+        return content
 
     def get_img_bytestr(self, impath: str) -> Tuple[str, bytes]:
         assert isinstance(self.file, zipfile.ZipFile)
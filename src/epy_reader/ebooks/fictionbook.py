@@ -6,6 +6,10 @@ from typing import List, Tuple, Union
 from epy_reader.ebooks import Ebook
 from epy_reader.models import BookMetadata, TocEntry
 
+# serialize FictionBook elements without a namespace prefix,
+# registered once here instead of on every get_raw_text() call
+ET.register_namespace("", "http://www.gribuser.ru/xml/fictionbook/2.0")
+
 
 class FictionBook(Ebook):
     NAMESPACE = {"FB2": "http://www.gribuser.ru/xml/fictionbook/2.0"}
@@ -57,9 +61,9 @@ class FictionBook(Ebook):
 
     def get_raw_text(self, node: Union[str, ET.Element]) -> str:
         assert isinstance(node, ET.Element)
-        ET.register_namespace("", "http://www.gribuser.ru/xml/fictionbook/2.0")
         # sys.exit(ET.tostring(node, encoding="utf8", method="html").decode("utf-8").replace("ns1:",""))
-        return ET.tostring(node, encoding="utf8", method="html").decode("utf-8").replace("ns1:", "")
+        # "ns1:" is the auto-generated prefix for xlink attributes, e.g. ns1:href
+        return ET.tostring(node, encoding="unicode", method="html").replace("ns1:", "")
 
     def get_img_bytestr(self, imgid: str) -> Tuple[str, bytes]:
         # TODO: test if image works
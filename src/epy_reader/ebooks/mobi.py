@@ -19,12 +19,11 @@ class Mobi(Epub):
         # by calling self.initialize()
         self.root_filepath: str
         self.root_dirpath: str
+        self.content_opf: ET.ElementTree
 
     def get_meta(self) -> BookMetadata:
-        # why self.file.read(self.root_filepath) problematic
-        with open(os.path.join(self.root_dirpath, "content.opf")) as f:
-            content_opf = ET.parse(f)  # .getroot()
-        return Epub._get_metadata(content_opf)
+        # content.opf is already parsed by self.initialize()
+        return Epub._get_metadata(self.content_opf)
 
     def initialize(self) -> None:
         assert isinstance(self.file, str)
@@ -39,6 +38,7 @@ class Mobi(Epub):
 
         with open(os.path.join(self.root_dirpath, "content.opf")) as f:
             content_opf = ET.parse(f)  # .getroot()
+        self.content_opf = content_opf
 
         contents = Epub._get_contents(content_opf)
         self.contents = tuple(os.path.join(self.root_dirpath, content) for content in contents)
@@ -44,12 +44,21 @@ def truncate(teks: str, subtitution_text: str, maxlen: int, startsub: int = 0) -
         return beg + mid + end
 
 
+def count_non_whitespace(text: str) -> int:
+    r"""
+    Count characters which are not whitespace,
+    same as len(re.sub(r"\s", "", text)) without building the stripped string
+    """
+    return sum(map(len, text.split()))
+
+
 def tuple_subtract(tuple_one: Tuple[Any, ...], tuple_two: Tuple[Any, ...]) -> Tuple[Any, ...]:
     """
     Returns tuple with members in tuple_one
     but not in tuple_two
     """
-    return tuple(i for i in tuple_one if i not in tuple_two)
+    excluded = set(tuple_two)
+    return tuple(i for i in tuple_one if i not in excluded)
 
 
 def resolve_path(current_dir: str, relative_path: str) -> str:
@@ -1,8 +1,10 @@
 import os
-from dataclasses import dataclass
+import re
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Mapping, Optional, Tuple, Union
+from functools import cached_property, lru_cache
+from typing import Any, Dict, Mapping, Optional, Tuple, Union
 
 
 class Direction(Enum):
@@ -23,6 +25,12 @@ class BookMetadata:
     source: Optional[str] = None
 
 
+@lru_cache(maxsize=None)
+def _home_dir() -> str:
+    """Expanded once, as every library item shortens its path with it"""
+    return os.path.expanduser("~")
+
+
 @dataclass(frozen=True)
 class LibraryItem:
     last_read: datetime
@@ -39,7 +47,7 @@ class LibraryItem:
         reading_progress_str = reading_progress_str.rjust(4)
 
         book_name: str
-        filename = self.filepath.replace(os.path.expanduser("~"), "~", 1)
+        filename = self.filepath.replace(_home_dir(), "~", 1)
         if self.title is not None and self.author is not None:
             book_name = f"{self.title} - {self.author} ({filename})"
         elif self.title is None and self.author:
@@ -78,6 +86,8 @@ class ReadingState:
 class SearchData:
     direction: Direction = Direction.FORWARD
     value: str = ""
+    # compiled `value`, kept so it isn't recompiled on every search keypress
+    pattern: Optional[re.Pattern] = field(default=None, compare=False, repr=False)
 
 
 @dataclass(frozen=True)
@@ -191,24 +201,35 @@ class Key:
     Because ord("k") chr(34) are confusing
     """
 
+    _cache: Dict[int, "Key"] = {}
+
     def __init__(self, char_or_int: Union[str, int]):
         self.value: int = char_or_int if isinstance(char_or_int, int) else ord(char_or_int)
         self.char: str = char_or_int if isinstance(char_or_int, str) else chr(char_or_int)
 
+    @classmethod
+    def from_int(cls, value: int) -> "Key":
+        """
+        Shared Key instance for int key code,
+        meant for keys read by curses getch() on every keypress.
+        """
+        key = cls._cache.get(value)
+        if key is None:
+            key = cls(value)
+            cls._cache[value] = key
+        return key
+
     def __eq__(self, other: Any) -> bool:
         if isinstance(other, Key):
             return self.value == other.value
         return False
 
-    def __ne__(self, other: Any) -> bool:
-        return self.__eq__(other)
-
     def __hash__(self) -> int:
         return hash(self.value)
 
 
 class AppData:
-    @property
+    @cached_property
     def prefix(self) -> Optional[str]:
         """Return None if there exists no homedir | userdir"""
         prefix: Optional[str] = None
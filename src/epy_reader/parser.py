@@ -1,5 +1,7 @@
+import bisect
 import curses
 import dataclasses
+import itertools
 import re
 import textwrap
 from html import unescape
@@ -9,6 +11,8 @@ from urllib.parse import unquote
 
 from epy_reader.models import CharPos, InlineStyle, TextMark, TextSpan, TextStructure
 
+_WS_RE = re.compile(r"\s+")
+
 
 class HTMLtoLines(HTMLParser):
     para = {"p", "div"}
@@ -18,6 +22,7 @@ class HTMLtoLines(HTMLParser):
     hide = {"script", "style", "head"}
     ital = {"i", "em"}
     bold = {"b", "strong"}
+    head = {"h1", "h2", "h3", "h4", "h5", "h6"}
     # hide = {"script", "style", "head", ", "sub}
     # sup_lookup = "⁰¹²³⁴⁵⁶⁷⁸⁹"
     # sub_lookup = "₀₁₂₃₄₅₆₇₈₉"
@@ -71,11 +76,15 @@ class HTMLtoLines(HTMLParser):
         *,
         line_adjustment: int = 0,
         left_adjustment: int = 0,
+        line_offsets: Optional[Sequence[int]] = None,
     ) -> List[TextSpan]:
         """
         Adjust text span to wrapped lines.
         Not perfect, but should be good enough considering
         the limitation on commandline interface.
+
+        line_offsets are the chars length before each of wrapped_lines,
+        see HTMLtoLines._get_line_offsets(), can be passed to reuse them across spans.
         """
 
         # current_row = span.start.row + line_adjustment
@@ -83,12 +92,16 @@ class HTMLtoLines(HTMLParser):
         start_col = span.start.col
         end_col = start_col + span.n_letters
 
-        prev = 0  # chars length before current line
+        if line_offsets is None:
+            line_offsets = HTMLtoLines._get_line_offsets(wrapped_lines)
+
         spans: List[TextSpan] = []
-        for n, line in enumerate(wrapped_lines):
-            # + 1 compensates textwrap.wrap(*args, replace_whitespace=True, drop_whitespace=True)
-            line_len = len(line) + 1
-            current = prev + line_len  # chars length before next line
+        # lines ending before start_col can't overlap the span, so skip straight to
+        # the line containing start_col
+        for n in range(bisect.bisect_right(line_offsets, start_col) - 1, len(wrapped_lines)):
+            prev = line_offsets[n]  # chars length before current line
+            current = line_offsets[n + 1]  # chars length before next line
+            line_len = current - prev
 
             # -:unmarked *:marked
             # |------*****--------|
@@ -130,10 +143,17 @@ class HTMLtoLines(HTMLParser):
             elif prev > end_col:
                 break
 
-            prev = current
-
         return spans
 
+    @staticmethod
+    def _get_line_offsets(wrapped_lines: Sequence[str]) -> List[int]:
+        """
+        Chars length before each of wrapped lines,
+        with one more item for the total chars length.
+        """
+        # + 1 compensates textwrap.wrap(*args, replace_whitespace=True, drop_whitespace=True)
+        return [0, *itertools.accumulate(len(line) + 1 for line in wrapped_lines)]
+
     @staticmethod
     def _group_spans_by_row(blocks: Sequence[TextSpan]) -> Mapping[int, List[TextSpan]]:
         groups: Dict[int, List[TextSpan]] = {}
@@ -146,7 +166,13 @@ class HTMLtoLines(HTMLParser):
         return groups
 
     def __init__(self, sects={""}):
+        self.sects = sects
+        # HTMLParser.__init__() calls self.reset()
         HTMLParser.__init__(self)
+
+    def reset(self):
+        """Reset parsed document so the same parser can be fed another one"""
+        HTMLParser.reset(self)
         self.text = [""]
         self.ishead = False
         self.isinde = False
@@ -158,14 +184,13 @@ class HTMLtoLines(HTMLParser):
         self.idbull = set()
         self.idpref = set()
         self.idimgs = set()
-        self.sects = sects
         self.sectsindex = {}
         self.italic_marks: List[TextMark] = []
         self.bold_marks: List[TextMark] = []
         self.imgs: Dict[int, str] = dict()
 
     def handle_starttag(self, tag, attrs):
-        if re.match("h[1-6]", tag) is not None:
+        if tag in self.head:
             self.ishead = True
         elif tag in self.inde:
             self.isinde = True
@@ -183,8 +208,9 @@ class HTMLtoLines(HTMLParser):
         # In HTML, both are startendtag (no need endtag)
         # but in XHTML both need endtag
         elif tag in {"img", "image"}:
+            is_img = tag == "img"
             for i in attrs:
-                if (tag == "img" and i[0] == "src") or (tag == "image" and i[0].endswith("href")):
+                if (i[0] == "src") if is_img else i[0].endswith("href"):
                     this_line = len(self.text)
                     self.idimgs.add(this_line)
                     self.imgs[this_line] = unquote(i[1])
@@ -192,27 +218,32 @@ class HTMLtoLines(HTMLParser):
         # formatting
         elif tag in self.ital:
             if len(self.italic_marks) == 0 or self.italic_marks[-1].is_valid():
-                char_pos = CharPos(row=len(self.text) - 1, col=len(self.text[-1]))
+                text = self.text
+                char_pos = CharPos(row=len(text) - 1, col=len(text[-1]))
                 self.italic_marks.append(TextMark(start=char_pos))
         elif tag in self.bold:
             if len(self.bold_marks) == 0 or self.bold_marks[-1].is_valid():
-                char_pos = CharPos(row=len(self.text) - 1, col=len(self.text[-1]))
+                text = self.text
+                char_pos = CharPos(row=len(text) - 1, col=len(text[-1]))
                 self.bold_marks.append(TextMark(start=char_pos))
-        if self.sects != {""}:
+        sects = self.sects
+        if sects != {""}:
+            row = len(self.text) - 1
             for i in attrs:
-                if i[0] == "id" and i[1] in self.sects:
+                if i[0] == "id" and i[1] in sects:
                     # self.text[-1] += " (#" + i[1] + ") "
                     # self.sectsindex.append([len(self.text), i[1]])
-                    self.sectsindex[len(self.text) - 1] = i[1]
+                    self.sectsindex[row] = i[1]
 
     def handle_startendtag(self, tag, attrs):
         if tag == "br":
-            self.text += [""]
+            self.text.append("")
         elif tag in {"img", "image"}:
+            is_img = tag == "img"
             for i in attrs:
                 #  if (tag == "img" and i[0] == "src")\
                 #     or (tag == "image" and i[0] == "xlink:href"):
-                if (tag == "img" and i[0] == "src") or (tag == "image" and i[0].endswith("href")):
+                if (i[0] == "src") if is_img else i[0].endswith("href"):
                     this_line = len(self.text)
                     self.idimgs.add(this_line)
                     self.imgs[this_line] = unquote(i[1])
@@ -220,31 +251,32 @@ class HTMLtoLines(HTMLParser):
                     self.text.append("")
         # sometimes attribute "id" is inside "startendtag"
         # especially html from mobi module (kindleunpack fork)
-        if self.sects != {""}:
+        sects = self.sects
+        if sects != {""}:
+            row = len(self.text) - 1
             for i in attrs:
-                if i[0] == "id" and i[1] in self.sects:
+                if i[0] == "id" and i[1] in sects:
                     # self.text[-1] += " (#" + i[1] + ") "
-                    self.sectsindex[len(self.text) - 1] = i[1]
+                    self.sectsindex[row] = i[1]
 
     def handle_endtag(self, tag):
-        if re.match("h[1-6]", tag) is not None:
-            self.text.append("")
-            self.text.append("")
+        if tag in self.head:
+            self.text.extend(("", ""))
             self.ishead = False
         elif tag in self.para:
             self.text.append("")
         elif tag in self.hide:
             self.ishidden = False
         elif tag in self.inde:
-            if self.text[-1] != "":
+            if self.text[-1]:
                 self.text.append("")
             self.isinde = False
         elif tag in self.pref:
-            if self.text[-1] != "":
+            if self.text[-1]:
                 self.text.append("")
             self.ispref = False
         elif tag in self.bull:
-            if self.text[-1] != "":
+            if self.text[-1]:
                 self.text.append("")
             self.isbull = False
         elif tag in {"sub", "sup"}:
@@ -253,33 +285,38 @@ class HTMLtoLines(HTMLParser):
             self.text.append("")
         # formatting
         elif tag in self.ital:
-            char_pos = CharPos(row=len(self.text) - 1, col=len(self.text[-1]))
+            text = self.text
+            char_pos = CharPos(row=len(text) - 1, col=len(text[-1]))
             last_mark = self.italic_marks[-1]
             self.italic_marks[-1] = dataclasses.replace(last_mark, end=char_pos)
         elif tag in self.bold:
-            char_pos = CharPos(row=len(self.text) - 1, col=len(self.text[-1]))
+            text = self.text
+            char_pos = CharPos(row=len(text) - 1, col=len(text[-1]))
             last_mark = self.bold_marks[-1]
             self.bold_marks[-1] = dataclasses.replace(last_mark, end=char_pos)
 
     def handle_data(self, raw):
         if raw and not self.ishidden:
-            if self.text[-1] == "":
+            # local bindings, this is called for every chunk of text
+            text = self.text
+            if text[-1] == "":
                 tmp = raw.lstrip()
             else:
                 tmp = raw
             if self.ispref:
                 line = unescape(tmp)
             else:
-                line = unescape(re.sub(r"\s+", " ", tmp))
-            self.text[-1] += line
+                line = unescape(_WS_RE.sub(" ", tmp))
+            text[-1] += line
+            row = len(text) - 1
             if self.ishead:
-                self.idhead.add(len(self.text) - 1)
+                self.idhead.add(row)
             elif self.isbull:
-                self.idbull.add(len(self.text) - 1)
+                self.idbull.add(row)
             elif self.isinde:
-                self.idinde.add(len(self.text) - 1)
+                self.idinde.add(row)
             elif self.ispref:
-                self.idpref.add(len(self.text) - 1)
+                self.idpref.add(row)
 
     def get_structured_text(
         self, textwidth: Optional[int] = 0, starting_line: int = 0
@@ -297,6 +334,13 @@ class HTMLtoLines(HTMLParser):
         bold_spans: List[TextSpan] = HTMLtoLines._mark_to_spans(self.text, self.bold_marks)
         italic_groups = HTMLtoLines._group_spans_by_row(italic_spans)
         bold_groups = HTMLtoLines._group_spans_by_row(bold_spans)
+        # lines wrapped with 3 chars of left padding (bullet and indented),
+        # unioned once here instead of for every line
+        indented_ids = self.idbull | self.idinde
+        # one TextWrapper per width instead of one per textwrap.wrap() call
+        wrapper = textwrap.TextWrapper(textwidth)
+        indented_wrapper = textwrap.TextWrapper(textwidth - 3)
+        preformatted_wrapper = textwrap.TextWrapper(textwidth - 6)
 
         for n, line in enumerate(self.text):
 
@@ -318,15 +362,15 @@ class HTMLtoLines(HTMLParser):
                     for i in range(startline, len(text))
                 ]
             elif n in self.idinde:
-                text += ["   " + i for i in textwrap.wrap(line, textwidth - 3)] + [""]
+                text += ["   " + i for i in indented_wrapper.wrap(line)] + [""]
             elif n in self.idbull:
-                tmp = textwrap.wrap(line, textwidth - 3)
+                tmp = indented_wrapper.wrap(line)
                 text += [" - " + i if i == tmp[0] else "   " + i for i in tmp] + [""]
             elif n in self.idpref:
                 tmp = line.splitlines()
                 wraptmp = []
                 for tmp_line in tmp:
-                    wraptmp += [i for i in textwrap.wrap(tmp_line, textwidth - 6)]
+                    wraptmp += [i for i in preformatted_wrapper.wrap(tmp_line)]
                 text += ["   " + i for i in wraptmp] + [""]
             elif n in self.idimgs:
                 images[starting_line + len(text)] = self.imgs[n]
@@ -341,45 +385,36 @@ class HTMLtoLines(HTMLParser):
                 ]
                 text += [""]
             else:
-                text += textwrap.wrap(line, textwidth) + [""]
+                text += wrapper.wrap(line) + [""]
 
             endline = len(text)  # -1
 
-            left_adjustment = 3 if n in self.idbull | self.idinde else 0
-
-            for spans in italic_groups.get(n, []):
-                italics = HTMLtoLines._adjust_wrapped_spans(
-                    text[startline:endline],
-                    spans,
-                    line_adjustment=startline,
-                    left_adjustment=left_adjustment,
-                )
-                for span in italics:
-                    formatting.append(
-                        InlineStyle(
-                            row=starting_line + span.start.row,
-                            col=span.start.col,
-                            n_letters=span.n_letters,
-                            attr=self.attr_italic,
+            left_adjustment = 3 if n in indented_ids else 0
+
+            if n in italic_groups or n in bold_groups:
+                wrapped_lines = text[startline:endline]
+                line_offsets = HTMLtoLines._get_line_offsets(wrapped_lines)
+                for groups, attr in (
+                    (italic_groups, self.attr_italic),
+                    (bold_groups, self.attr_bold),
+                ):
+                    for spans in groups.get(n, []):
+                        adjusted_spans = HTMLtoLines._adjust_wrapped_spans(
+                            wrapped_lines,
+                            spans,
+                            line_adjustment=startline,
+                            left_adjustment=left_adjustment,
+                            line_offsets=line_offsets,
                         )
-                    )
-
-            for spans in bold_groups.get(n, []):
-                bolds = HTMLtoLines._adjust_wrapped_spans(
-                    text[startline:endline],
-                    spans,
-                    line_adjustment=startline,
-                    left_adjustment=left_adjustment,
-                )
-                for span in bolds:
-                    formatting.append(
-                        InlineStyle(
-                            row=starting_line + span.start.row,
-                            col=span.start.col,
-                            n_letters=span.n_letters,
-                            attr=self.attr_bold,
-                        )
-                    )
+                        for span in adjusted_spans:
+                            formatting.append(
+                                InlineStyle(
+                                    row=starting_line + span.start.row,
+                                    col=span.start.col,
+                                    n_letters=span.n_letters,
+                                    attr=attr,
+                                )
+                            )
 
         # chapter suffix
         text += ["***".center(textwidth)]
@@ -398,6 +433,7 @@ def parse_html(
     textwidth: Optional[int] = None,
     section_ids: Optional[Set[str]] = None,
     starting_line: int = 0,
+    parser: Optional[HTMLtoLines] = None,
 ) -> Union[Tuple[str, ...], TextStructure]:
     """
     Parse html string into TextStructure
@@ -406,12 +442,17 @@ def parse_html(
     :param textwidth: textwidth to count max length of returned TextStructure
                       if None given, sequence of text as paragraph is returned
     :param section_ids: set of section ids to look for inside html tag attr
+    :param parser: HTMLtoLines to reuse when parsing many html, eg. all book contents
     :return: Tuple[str, ...] if textwidth not given else TextStructure
     """
     if not section_ids:
         section_ids = set()
 
-    parser = HTMLtoLines(section_ids)
+    if parser is None:
+        parser = HTMLtoLines(section_ids)
+    else:
+        parser.reset()
+        parser.sects = section_ids
     # try:
     parser.feed(html_src)
     parser.close()
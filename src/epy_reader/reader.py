@@ -1,9 +1,14 @@
-import copy
+import bisect
 import curses
 import dataclasses
+import functools
+import itertools
 import multiprocessing
+import multiprocessing.pool
 import os
+import pickle
 import re
+import shlex
 import shutil
 import signal
 import sqlite3
@@ -12,14 +17,15 @@ import sys
 import tempfile
 import uuid
 import xml.etree.ElementTree as ET
+from collections import OrderedDict
 from html import unescape
-from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
 
 import epy_reader.settings as settings
 from epy_reader.board import InfiniBoard
 from epy_reader.config import Config
 from epy_reader.ebooks import Azw, Ebook, Epub, Mobi
-from epy_reader.lib import resolve_path
+from epy_reader.lib import count_non_whitespace, resolve_path
 from epy_reader.models import (
     Direction,
     InlineStyle,
@@ -31,18 +37,22 @@ from epy_reader.models import (
     TextStructure,
     TocEntry,
 )
-from epy_reader.parser import parse_html
+from epy_reader.parser import HTMLtoLines, parse_html
 from epy_reader.settings import DoubleSpreadPadding
 from epy_reader.speakers import SpeakerBaseModel
 from epy_reader.state import State
 from epy_reader.utils import (
+    DIGIT_KEYS,
     choice_win,
+    construct_letters_count,
     construct_relative_reading_state,
     construct_speaker,
+    count_content_letters_in_worker,
     count_letters,
-    count_letters_parallel,
     find_current_content_index,
     get_ebook_obj,
+    init_counting_letters_worker,
+    merge_queued_scrolls,
     merge_text_structures,
     pgend,
     safe_curs_set,
@@ -53,6 +63,14 @@ from epy_reader.utils import (
 # TODO: to be deprecated
 DEBUG = False
 
+_HTML_TAG_RE = re.compile(r"<[^>]*>")
+
+# help menu labels of keymap names, eg. "ScrollUp" -> "Scroll Up"
+_KEYMAP_LABELS = {
+    field.name: " ".join(re.findall("[A-Z][^A-Z]*", field.name))
+    for field in dataclasses.fields(settings.CfgDefaultKeymaps)
+}
+
 
 class Reader:
     def __init__(self, screen, ebook: Ebook, config: Config, state: State):
@@ -74,6 +92,18 @@ class Reader:
             + self.keymap.Help
         )
 
+        # mouse buttons and the keys they act as in reader,
+        # 2097152 is mouse wheel down (BUTTON5_PRESSED)
+        # left click isn't here since it depends on where it's clicked
+        self._mouse_keys: Dict[int, Key] = {
+            curses.BUTTON3_CLICKED: self.keymap.TableOfContents[0],
+            curses.BUTTON4_PRESSED: self.keymap.ScrollUp[0],
+            2097152: self.keymap.ScrollDown[0],
+            curses.BUTTON4_PRESSED + curses.BUTTON_CTRL: self.keymap.Enlarge[0],
+            2097152 + curses.BUTTON_CTRL: self.keymap.Shrink[0],
+            curses.BUTTON2_CLICKED: self.keymap.TTSToggle[0],
+        }
+
         # screen initialization
         self.screen = screen
         self.screen.keypad(True)
@@ -122,6 +152,17 @@ class Reader:
         # search storage
         self.search_data: Optional[SearchData] = None
 
+        # parsed book contents, keyed by (content_index, textwidth)
+        # least recently used one is dropped when there are more than 8 of them
+        self._text_structures: "OrderedDict[Tuple[int, int], TextStructure]" = OrderedDict()
+        self._text_structures_maxsize = 8
+        # current toc entry index keyed by (content_index, row) for content being read,
+        # see Reader.find_current_toc_index()
+        self._toc_indices: Dict[Tuple[int, int], int] = {}
+        self._sorted_toc_content_indices: Optional[List[int]] = None
+        # reset and reused for every content parsed
+        self._html_parser = HTMLtoLines()
+
         # double spread
         self.spread = 2 if self.setting.StartWithDoubleSpread else 1
 
@@ -137,49 +178,59 @@ class Reader:
 
         # multi process & progress percentage
         self._multiprocess_support: bool = False if multiprocessing.cpu_count() == 1 else True
-        self._process_counting_letter: Optional[multiprocessing.Process] = None
+        self._pool_counting_letters: Optional[multiprocessing.pool.Pool] = None
+        self._letters_per_content: Optional[multiprocessing.pool.AsyncResult] = None
         self.letters_count: Optional[LettersCount] = None
 
     def run_counting_letters(self):
         if self._multiprocess_support:
             try:
-                self._proc_parent, self._proc_child = multiprocessing.Pipe()
-                self._process_counting_letter = multiprocessing.Process(
-                    name="epy-subprocess-counting-letters",
-                    target=count_letters_parallel,
-                    args=(copy.deepcopy(self.ebook), self._proc_child),
+                # contents are counted in parallel, each worker with its own copy of the ebook
+                self._pool_counting_letters = multiprocessing.Pool(
+                    processes=min(multiprocessing.cpu_count(), len(self.ebook.contents)),
+                    initializer=init_counting_letters_worker,
+                    initargs=(pickle.dumps(self.ebook),),
+                )
+                self._letters_per_content = self._pool_counting_letters.map_async(
+                    count_content_letters_in_worker, range(len(self.ebook.contents))
                 )
-                # forking will raise
-                # zlib.error: Error -3 while decompressing data: invalid distance too far back
-                self._process_counting_letter.start()
             except Exception as e:
                 if DEBUG:
                     raise e
+                self.stop_counting_letters()
                 self._multiprocess_support = False
         if not self._multiprocess_support:
             self.letters_count = count_letters(self.ebook)
 
     def try_assign_letters_count(self, *, force_wait=False) -> None:
-        if isinstance(self._process_counting_letter, multiprocessing.Process):
-            if force_wait and self._process_counting_letter.is_alive():
-                self._process_counting_letter.join()
-
-            if self._process_counting_letter.exitcode == 0:
-                self.letters_count = self._proc_parent.recv()
-                self._proc_parent.close()
-                self._process_counting_letter.terminate()
-                self._process_counting_letter.close()
-                self._process_counting_letter = None
+        if self._letters_per_content is not None:
+            if force_wait:
+                self._letters_per_content.wait()
+
+            if self._letters_per_content.ready():
+                if self._letters_per_content.successful():
+                    self.letters_count = construct_letters_count(self._letters_per_content.get())
+                self.stop_counting_letters()
+
+    def stop_counting_letters(self) -> None:
+        if self._pool_counting_letters is not None:
+            self._pool_counting_letters.terminate()
+            self._pool_counting_letters.join()
+            self._pool_counting_letters = None
+        self._letters_per_content = None
 
     def calculate_reading_progress(
-        self, letters_per_content: List[int], reading_state: ReadingState
+        self, cumulative_letters: Sequence[int], reading_state: ReadingState
     ) -> None:
+        """
+        :param cumulative_letters: total letters in the first n lines of current content
+                                   for n in 0..len(lines), eg. (0, 12, 12, 40, ...)
+        """
         if self.letters_count:
+            n_lines = reading_state.row + (self.screen_rows * self.spread) - 1
             self.reading_progress = (
                 self.letters_count.cumulative[reading_state.content_index]
-                + sum(
-                    letters_per_content[: reading_state.row + (self.screen_rows * self.spread) - 1]
-                )
+                + cumulative_letters[min(n_lines, len(cumulative_letters) - 1)]
             ) / self.letters_count.all
 
     @property
@@ -190,42 +241,42 @@ class Reader:
     def screen_cols(self) -> int:
         return self.screen.getmaxyx()[1]
 
-    @property
+    @functools.cached_property
     def ext_dict_app(self) -> Optional[str]:
-        self._ext_dict_app: Optional[str] = None
+        ext_dict_app: Optional[str] = None
 
         if shutil.which(self.setting.DictionaryClient.split()[0]):
-            self._ext_dict_app = self.setting.DictionaryClient
+            ext_dict_app = self.setting.DictionaryClient
         else:
             for i in settings.DICT_PRESET_LIST:
                 if shutil.which(i) is not None:
-                    self._ext_dict_app = i
+                    ext_dict_app = i
                     break
-            if self._ext_dict_app in {"sdcv"}:
-                self._ext_dict_app += " -n"
+            if ext_dict_app in {"sdcv"}:
+                ext_dict_app += " -n"
 
-        return self._ext_dict_app
+        return ext_dict_app
 
-    @property
+    @functools.cached_property
     def image_viewer(self) -> Optional[str]:
-        self._image_viewer: Optional[str] = None
+        image_viewer: Optional[str] = None
 
         if shutil.which(self.setting.DefaultViewer.split()[0]) is not None:
-            self._image_viewer = self.setting.DefaultViewer
+            image_viewer = self.setting.DefaultViewer
         elif sys.platform == "win32":
-            self._image_viewer = "start"
+            image_viewer = "start"
         elif sys.platform == "darwin":
-            self._image_viewer = "open"
+            image_viewer = "open"
         else:
             for i in settings.VIEWER_PRESET_LIST:
                 if shutil.which(i) is not None:
-                    self._image_viewer = i
+                    image_viewer = i
                     break
 
-        if self._image_viewer in {"gio"}:
-            self._image_viewer += " open"
+        if image_viewer in {"gio"}:
+            image_viewer += " open"
 
-        return self._image_viewer
+        return image_viewer
 
     def open_image(self, pad, name, bstr):
         sfx = os.path.splitext(name)[1]
@@ -235,9 +286,12 @@ class Reader:
                 # tmp.write(epub.file.read(src))
                 tmp.write(bstr)
             # run(VWR + " " + path, shell=True)
+            # no need to spawn a shell, except for `start` which is a cmd.exe builtin
             subprocess.call(
-                self.image_viewer + " " + path,
-                shell=True,
+                self.image_viewer + " " + path
+                if sys.platform == "win32"
+                else [*shlex.split(self.image_viewer), path],
+                shell=sys.platform == "win32",
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL,
             )
@@ -246,6 +300,27 @@ class Reader:
             os.remove(path)
         return k
 
+    def consume_queued_keys(self, key: Key) -> int:
+        """
+        Consume consecutive `key` already waiting in the input queue
+        and return how many of them were consumed.
+        The first different key found, if any, is pushed back to the queue.
+        """
+        n = 0
+        self.screen.nodelay(True)
+        try:
+            while True:
+                pending = self.screen.getch()
+                if pending == -1:
+                    break
+                elif pending != key.value:
+                    curses.ungetch(pending)
+                    break
+                n += 1
+        finally:
+            self.screen.nodelay(False)
+        return n
+
     def show_loader(self, *, loader_str: str = "\u231B", subtext: Optional[str] = None):
         self.screen.clear()
         rows, cols = self.screen.getmaxyx()
@@ -276,30 +351,30 @@ class Reader:
     @text_win
     def show_win_metadata(self):
         if os.path.isfile(self.ebook.path):
-            mdata = "[File Info]\nPATH: {}\nSIZE: {} MB\n \n[Book Info]\n".format(
-                self.ebook.path, round(os.path.getsize(self.ebook.path) / 1024**2, 2)
-            )
+            mdata = [
+                "[File Info]\nPATH: {}\nSIZE: {} MB\n \n[Book Info]\n".format(
+                    self.ebook.path, round(os.path.getsize(self.ebook.path) / 1024**2, 2)
+                )
+            ]
         else:
-            mdata = "[File Info]\nPATH: {}\n \n[Book Info]\n".format(self.ebook.path)
+            mdata = ["[File Info]\nPATH: {}\n \n[Book Info]\n".format(self.ebook.path)]
 
         book_metadata = self.ebook.get_meta()
         for field in dataclasses.fields(book_metadata):
             value = getattr(book_metadata, field.name)
             if value:
-                value = unescape(re.sub("<[^>]*>", "", value))
-                mdata += f"{field.name.title()}: {value}\n"
+                value = unescape(_HTML_TAG_RE.sub("", value))
+                mdata.append(f"{field.name.title()}: {value}\n")
 
-        return "Metadata", mdata, self.keymap.Metadata
+        return "Metadata", "".join(mdata), self.keymap.Metadata
 
     @text_win
     def show_win_help(self):
-        src = "Key Bindings:\n"
+        src = ["Key Bindings:\n"]
         dig = max([len(i) for i in self.keymap_user_dict.values()]) + 2
         for i in self.keymap_user_dict.keys():
-            src += "{}  {}\n".format(
-                self.keymap_user_dict[i].rjust(dig), " ".join(re.findall("[A-Z][^A-Z]*", i))
-            )
-        return "Help", src, self.keymap.Help
+            src.append("{}  {}\n".format(self.keymap_user_dict[i].rjust(dig), _KEYMAP_LABELS[i]))
+        return "Help", "".join(src), self.keymap.Help
 
     @text_win
     def define_word(self, word):
@@ -307,11 +382,14 @@ class Reader:
         hi, wi = 5, 16
         Y, X = (rows - hi) // 2, (cols - wi) // 2
 
+        # without a shell the word is passed as is, even if it has shell metacharacters
         p = subprocess.Popen(
-            "{} {}".format(self.ext_dict_app, word),
+            "{} {}".format(self.ext_dict_app, word)
+            if sys.platform == "win32"
+            else [*shlex.split(self.ext_dict_app), word],
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            shell=True,
+            shell=sys.platform == "win32",
         )
 
         dictwin = curses.newwin(hi, wi, Y, X)
@@ -329,20 +407,31 @@ class Reader:
         else:
             return "Error: " + self.ext_dict_app, err.decode(), self.keymap.DefineWord
 
-    def show_win_choices_bookmarks(self):
+    def show_win_choices_bookmarks(
+        self, bookmarks: Optional[List[Tuple[str, ReadingState]]] = None
+    ) -> Tuple[Optional[Key], Optional[ReadingState]]:
+        """
+        :param bookmarks: bookmarks already fetched by caller,
+                          queried again only after one of them is deleted
+        :return: tuple of (returned_key, reading state of chosen bookmark)
+        """
         idx = 0
         while True:
-            bookmarks = [i[0] for i in self.state.get_bookmarks(self.ebook)]
+            if bookmarks is None:
+                bookmarks = self.state.get_bookmarks(self.ebook)
             if not bookmarks:
                 return self.keymap.ShowBookmarks[0], None
 
             retk, idx, todel = self.show_win_options(
-                "Bookmarks", bookmarks, idx, self.keymap.ShowBookmarks
+                "Bookmarks", [i[0] for i in bookmarks], idx, self.keymap.ShowBookmarks
             )
             if todel is not None:
-                self.state.delete_bookmark(self.ebook, bookmarks[todel])
+                self.state.delete_bookmark(self.ebook, bookmarks[todel][0])
+                bookmarks = None
             else:
-                return retk, idx
+                if retk is not None or idx is None:
+                    return retk, None
+                return None, bookmarks[idx][1]
 
     def show_win_library(self):
         while True:
@@ -416,7 +505,9 @@ class Reader:
                 else:
                     init_text += ipt.char
 
-                stat.clear()
+                # erase() instead of clear() so refresh only sends what changed
+                # rather than repainting the whole screen on every keystroke
+                stat.erase()
                 stat.addstr(0, 0, prompt, curses.A_REVERSE)
                 stat.addstr(
                     0,
@@ -459,19 +550,29 @@ class Reader:
                 assert isinstance(candidate_text, NoUpdate) or isinstance(candidate_text, Key)
                 return candidate_text
 
-        found = []
-        try:
-            pattern = re.compile(self.search_data.value, re.IGNORECASE)
-        except re.error as reerrmsg:
-            self.search_data = None
-            tmpk = self.show_win_error("!Regex Error", str(reerrmsg), tuple())
-            return tmpk
-
+        if self.search_data.pattern is None:
+            try:
+                self.search_data = dataclasses.replace(
+                    self.search_data, pattern=re.compile(self.search_data.value, re.IGNORECASE)
+                )
+            except re.error as reerrmsg:
+                self.search_data = None
+                tmpk = self.show_win_error("!Regex Error", str(reerrmsg), tuple())
+                return tmpk
+        pattern = self.search_data.pattern
+        assert pattern is not None
+
+        # matches as parallel lists of row, column and length
+        found_rows: List[int] = []
+        found_cols: List[int] = []
+        found_lens: List[int] = []
         for n, i in enumerate(src):
             for j in pattern.finditer(i):
-                found.append([n, j.span()[0], j.span()[1] - j.span()[0]])
+                found_rows.append(n)
+                found_cols.append(j.start())
+                found_lens.append(j.end() - j.start())
 
-        if not found:
+        if not found_rows:
             if (
                 self.search_data.direction == Direction.FORWARD
                 and reading_state.content_index + 1 < tot
@@ -517,7 +618,7 @@ class Reader:
                             row=0,
                         )
 
-                    self.screen.clear()
+                    self.screen.erase()
                     self.screen.addstr(
                         rows - 1,
                         0,
@@ -528,27 +629,34 @@ class Reader:
                     self.screen.refresh()
                     s = board.getch()
 
-        sidx = len(found) - 1
+        sidx = len(found_rows) - 1
         if self.search_data.direction == Direction.FORWARD:
-            if reading_state.row > found[-1][0]:
+            if reading_state.row > found_rows[-1]:
                 return ReadingState(
                     content_index=reading_state.content_index + 1,
                     textwidth=reading_state.textwidth,
                     row=0,
                 )
-            for n, i in enumerate(found):
-                if i[0] >= reading_state.row:
-                    sidx = n
-                    break
+            # first match at or after current row, there is one since rows are sorted
+            # and the last one isn't before current row
+            sidx = bisect.bisect_left(found_rows, reading_state.row)
 
         s = NoUpdate()
         msg = (
             " Searching: "
             + self.search_data.value
             + " --- Res {}/{} Ch {}/{} ".format(
-                sidx + 1, len(found), reading_state.content_index + 1, tot
+                sidx + 1, len(found_rows), reading_state.content_index + 1, tot
+            )
+        )
+        # styles for every match are fed once, n/N only switches the highlighted index
+        board.feed_temporary_style(
+            tuple(
+                InlineStyle(row=row, col=col, n_letters=n_letters, attr=curses.A_NORMAL)
+                for row, col, n_letters in zip(found_rows, found_cols, found_lens)
             )
         )
+        page_span = (rows - 1) * self.spread
         while True:
             if s in self.keymap.Quit:
                 self.search_data = None
@@ -563,7 +671,7 @@ class Reader:
                 self.search_data = dataclasses.replace(
                     self.search_data, direction=Direction.FORWARD
                 )
-                if sidx == len(found) - 1:
+                if sidx == len(found_rows) - 1:
                     if reading_state.content_index + 1 < tot:
                         return ReadingState(
                             content_index=reading_state.content_index + 1,
@@ -580,7 +688,7 @@ class Reader:
                         " Searching: "
                         + self.search_data.value
                         + " --- Res {}/{} Ch {}/{} ".format(
-                            sidx + 1, len(found), reading_state.content_index + 1, tot
+                            sidx + 1, len(found_rows), reading_state.content_index + 1, tot
                         )
                     )
             elif s == Key("N"):
@@ -604,7 +712,7 @@ class Reader:
                         " Searching: "
                         + self.search_data.value
                         + " --- Res {}/{} Ch {}/{} ".format(
-                            sidx + 1, len(found), reading_state.content_index + 1, tot
+                            sidx + 1, len(found_rows), reading_state.content_index + 1, tot
                         )
                     )
             elif s == Key(curses.KEY_RESIZE):
@@ -615,43 +723,45 @@ class Reader:
             #         reading_state, row=pad.chunks[pad.find_chunkidx(reading_state.row)] + 1
             #     )
 
-            while found[sidx][0] not in list(
-                range(reading_state.row, reading_state.row + (rows - 1) * self.spread)
-            ):
-                if found[sidx][0] > reading_state.row:
+            while not (reading_state.row <= found_rows[sidx] < reading_state.row + page_span):
+                if found_rows[sidx] > reading_state.row:
                     reading_state = dataclasses.replace(
-                        reading_state, row=reading_state.row + ((rows - 1) * self.spread)
+                        reading_state, row=reading_state.row + page_span
                     )
                 else:
                     reading_state = dataclasses.replace(
-                        reading_state, row=reading_state.row - ((rows - 1) * self.spread)
+                        reading_state, row=reading_state.row - page_span
                     )
                     if reading_state.row < 0:
                         reading_state = dataclasses.replace(reading_state, row=0)
 
             # formats = [InlineStyle(row=i[0], col=i[1], n_letters=i[2], attr=curses.A_REVERSE) for i in found]
             # pad.feed_style(formats)
-            styles: List[InlineStyle] = []
-            for n, i in enumerate(found):
-                attr = curses.A_REVERSE if n == sidx else curses.A_NORMAL
-                # pad.chgat(i[0], i[1], i[2], pad.getbkgd() | attr)
-                styles.append(
-                    InlineStyle(row=i[0], col=i[1], n_letters=i[2], attr=board.getbkgd() | attr)
-                )
-            board.feed_temporary_style(tuple(styles))
+            board.highlight_temporary_style(sidx)
 
-            self.screen.clear()
+            # draw everything before a single refresh so the terminal gets one update
+            self.screen.erase()
             self.screen.addstr(rows - 1, 0, msg, curses.A_REVERSE)
-            self.screen.refresh()
             # pad.refresh(reading_state.row, 0, 0, x, rows - 2, x + reading_state.textwidth)
             board.write(reading_state.row, 1)
+            self.screen.refresh()
             s = board.getch()
 
     def speaking(self, text):
         self.is_speaking = True
         self.screen.addstr(self.screen_rows - 1, 0, " Speaking! ", curses.A_REVERSE)
         self.screen.refresh()
-        self.screen.timeout(1)
+        # getch() waits for input up to this long (ms) before checking the speaker again,
+        # short enough to turn the page soon after speaking is done without busy polling
+        self.screen.timeout(100)
+        stop_keys = frozenset(
+            self.keymap.Quit
+            + self.keymap.PageUp
+            + self.keymap.PageDown
+            + self.keymap.ScrollUp
+            + self.keymap.ScrollDown
+            + (curses.KEY_RESIZE,)
+        )
         try:
             self._tts_speaker.speak(text)
 
@@ -660,7 +770,7 @@ class Reader:
                     k = self.keymap.PageDown[0]
                     break
                 tmp = self.screen.getch()
-                k = NoUpdate() if tmp == -1 else Key(tmp)
+                k = NoUpdate() if tmp == -1 else Key.from_int(tmp)
                 if k == Key(curses.KEY_MOUSE):
                     mouse_event = curses.getmouse()
                     if mouse_event[4] == curses.BUTTON2_CLICKED:
@@ -674,15 +784,7 @@ class Reader:
                         k = self.keymap.ScrollUp[0]
                     elif mouse_event[4] == 2097152:
                         k = self.keymap.ScrollDown[0]
-                if (
-                    k
-                    in self.keymap.Quit
-                    + self.keymap.PageUp
-                    + self.keymap.PageDown
-                    + self.keymap.ScrollUp
-                    + self.keymap.ScrollDown
-                    + (curses.KEY_RESIZE,)
-                ):
+                if k in stop_keys:
                     self._tts_speaker.stop()
                     break
         finally:
@@ -701,17 +803,10 @@ class Reader:
         self.state.update_library(self.ebook, self.reading_progress)
 
     def cleanup(self) -> None:
+        # stop workers before the ebook (eg. unpacked mobi) is cleaned up under them
+        self.stop_counting_letters()
         self.ebook.cleanup()
 
-        if isinstance(self._process_counting_letter, multiprocessing.Process):
-            if self._process_counting_letter.is_alive():
-                self._process_counting_letter.terminate()
-                # weird python multiprocessing issue, need to call .join() before .close()
-                # ValueError: Cannot close a process while it is still running.
-                # You should first call join() or terminate().
-                self._process_counting_letter.join()
-                self._process_counting_letter.close()
-
     def convert_absolute_reading_state_to_relative(self, reading_state) -> ReadingState:
         if not self.seamless:
             raise RuntimeError(
@@ -765,6 +860,7 @@ class Reader:
                 textwidth=reading_state.textwidth,
                 section_ids=set(toc_entry.section for toc_entry in toc_entries),  # type: ignore
                 starting_line=starting_line,
+                parser=self._html_parser,
             )
             assert isinstance(text_structure_tmp, TextStructure)
             # self.totlines_per_content.append(len(text_structure_tmp.text_lines))
@@ -794,15 +890,58 @@ class Reader:
     ) -> Tuple[TextStructure, Tuple[TocEntry, ...], Union[Tuple[str, ...], Tuple[ET.Element, ...]]]:
         contents = self.ebook.contents
         toc_entries = self.ebook.toc_entries
-        content_path = contents[reading_state.content_index]
-        content = self.ebook.get_raw_text(content_path)
-        text_structure = parse_html(  # type: ignore
-            content,
-            textwidth=reading_state.textwidth,
-            section_ids=set(toc_entry.section for toc_entry in toc_entries),  # type: ignore
+        text_structure = self.get_content_text_structure(
+            reading_state.content_index, reading_state.textwidth
         )
         return text_structure, toc_entries, contents
 
+    def get_content_text_structure(self, content_index: int, textwidth: int) -> TextStructure:
+        """
+        Parse book content at `content_index` with given `textwidth`.
+        Parsed result is memoized so the same content won't get parsed twice,
+        eg. on PageUp to previous content which is then being read.
+        Only the most recently used contents are kept.
+        """
+        key = (content_index, textwidth)
+        text_structure = self._text_structures.get(key)
+        if text_structure is None:
+            # contents parsed with previous textwidth won't be reused after width change
+            for stale_key in [i for i in self._text_structures if i[1] != textwidth]:
+                del self._text_structures[stale_key]
+
+            text_structure = parse_html(
+                self.ebook.get_raw_text(self.ebook.contents[content_index]),
+                textwidth=textwidth,
+                section_ids=set(toc_entry.section for toc_entry in self.ebook.toc_entries),  # type: ignore
+                parser=self._html_parser,
+            )
+            assert isinstance(text_structure, TextStructure)
+            self._text_structures[key] = text_structure
+            if len(self._text_structures) > self._text_structures_maxsize:
+                self._text_structures.popitem(last=False)
+        else:
+            self._text_structures.move_to_end(key)
+        return text_structure
+
+    def find_current_toc_index(
+        self,
+        toc_entries: Tuple[TocEntry, ...],
+        section_rows: Mapping[str, int],
+        reading_state: ReadingState,
+    ) -> int:
+        """
+        Index of toc entry `reading_state` is currently in.
+        Memoized for the content being read, read() clears it when loading a content.
+        """
+        key = (reading_state.content_index, reading_state.row)
+        ntoc = self._toc_indices.get(key)
+        if ntoc is None:
+            ntoc = find_current_content_index(
+                toc_entries, section_rows, *key, self._sorted_toc_content_indices
+            )
+            self._toc_indices[key] = ntoc
+        return ntoc
+
     def read(self, reading_state: ReadingState) -> Union[ReadingState, Ebook]:
         # reusable loop indices
         i: Any
@@ -866,9 +1005,16 @@ class Reader:
             spread=self.spread,
         )
 
-        letters_per_content: List[int] = []
-        for i in text_structure.text_lines:
-            letters_per_content.append(len(re.sub(r"\s", "", i)))
+        letters_per_content: List[int] = list(map(count_non_whitespace, text_structure.text_lines))
+        cumulative_letters = [0, *itertools.accumulate(letters_per_content)]
+
+        # toc entries and section rows are rebuilt for this content,
+        # so toc entries looked up in previous content are stale
+        toc_content_indices = [i.content_index for i in toc_entries]
+        self._sorted_toc_content_indices = (
+            toc_content_indices if toc_content_indices == sorted(toc_content_indices) else None
+        )
+        self._toc_indices.clear()
 
         self.screen.clear()
         self.screen.refresh()
@@ -892,7 +1038,9 @@ class Reader:
                     count = 1
                 else:
                     count = int(countstring)
-                if k in tuple(Key(i) for i in range(48, 58)):  # i.e., k is a numeral
+                # rows shown on screen across all spreads
+                page_rows = rows * self.spread
+                if k in DIGIT_KEYS:
                     countstring = countstring + k.char
                 else:
                     if k in self.keymap.Quit:
@@ -900,7 +1048,7 @@ class Reader:
                             countstring = ""
                         else:
                             self.try_assign_letters_count(force_wait=True)
-                            self.calculate_reading_progress(letters_per_content, reading_state)
+                            self.calculate_reading_progress(cumulative_letters, reading_state)
 
                             self.savestate(
                                 dataclasses.replace(
@@ -910,14 +1058,12 @@ class Reader:
                             sys.exit()
 
                     elif k in self.keymap.TTSToggle and self.tts_support:
-                        tospeak = ""
-                        for i in text_structure.text_lines[
-                            reading_state.row : reading_state.row + (rows * self.spread)
-                        ]:
-                            if re.match(r"^\s*$", i) is not None:
-                                tospeak += "\n. \n"
-                            else:
-                                tospeak += i + " "
+                        tospeak = "".join(
+                            "\n. \n" if not i or i.isspace() else i + " "
+                            for i in text_structure.text_lines[
+                                reading_state.row : reading_state.row + page_rows
+                            ]
+                        )
                         k = self.speaking(tospeak)
                         if (
                             totlines - reading_state.row <= rows
@@ -947,6 +1093,15 @@ class Reader:
                             continue
                         if count > 1:
                             checkpoint_row = reading_state.row - 1
+                        # repeats queued up while the key is held down are scrolled at once,
+                        # one is put back if they overshoot so it can move to other content
+                        assert isinstance(k, Key)
+                        extra, put_back = merge_queued_scrolls(
+                            self.consume_queued_keys(k), reading_state.row - count
+                        )
+                        count += extra
+                        if put_back:
+                            curses.ungetch(k.value)
                         if reading_state.row >= count:
                             reading_state = dataclasses.replace(
                                 reading_state, row=reading_state.row - count
@@ -965,27 +1120,20 @@ class Reader:
                     elif k in self.keymap.PageUp:
                         if reading_state.row == 0 and reading_state.content_index != 0:
                             self.page_animation = Direction.BACKWARD
-                            text_structure_content_before = parse_html(
-                                self.ebook.get_raw_text(contents[reading_state.content_index - 1]),
-                                textwidth=reading_state.textwidth,
+                            text_structure_content_before = self.get_content_text_structure(
+                                reading_state.content_index - 1, reading_state.textwidth
                             )
-                            assert isinstance(text_structure_content_before, TextStructure)
                             return ReadingState(
                                 content_index=reading_state.content_index - 1,
                                 textwidth=reading_state.textwidth,
-                                row=rows
-                                * self.spread
-                                * (
-                                    len(text_structure_content_before.text_lines)
-                                    // (rows * self.spread)
-                                ),
+                                row=page_rows
+                                * (len(text_structure_content_before.text_lines) // page_rows),
                             )
                         else:
-                            if reading_state.row >= rows * self.spread * count:
+                            if reading_state.row >= page_rows * count:
                                 self.page_animation = Direction.BACKWARD
                                 reading_state = dataclasses.replace(
-                                    reading_state,
-                                    row=reading_state.row - (rows * self.spread * count),
+                                    reading_state, row=reading_state.row - page_rows * count
                                 )
                             else:
                                 reading_state = dataclasses.replace(reading_state, row=0)
@@ -996,6 +1144,13 @@ class Reader:
                             continue
                         if count > 1:
                             checkpoint_row = reading_state.row + rows - 1
+                        assert isinstance(k, Key)
+                        extra, put_back = merge_queued_scrolls(
+                            self.consume_queued_keys(k), totlines - rows - reading_state.row - count
+                        )
+                        count += extra
+                        if put_back:
+                            curses.ungetch(k.value)
                         if reading_state.row + count <= totlines - rows:
                             reading_state = dataclasses.replace(
                                 reading_state, row=reading_state.row + count
@@ -1012,10 +1167,10 @@ class Reader:
                             )
 
                     elif k in self.keymap.PageDown:
-                        if totlines - reading_state.row > rows * self.spread:
+                        if totlines - reading_state.row > page_rows:
                             self.page_animation = Direction.FORWARD
                             reading_state = dataclasses.replace(
-                                reading_state, row=reading_state.row + (rows * self.spread)
+                                reading_state, row=reading_state.row + page_rows
                             )
                         elif reading_state.content_index != len(contents) - 1:
                             self.page_animation = Direction.FORWARD
@@ -1031,11 +1186,8 @@ class Reader:
                     #     continue
 
                     elif k in self.keymap.NextChapter:
-                        ntoc = find_current_content_index(
-                            toc_entries,
-                            text_structure.section_rows,
-                            reading_state.content_index,
-                            reading_state.row,
+                        ntoc = self.find_current_toc_index(
+                            toc_entries, text_structure.section_rows, reading_state
                         )
                         if ntoc < len(toc_entries) - 1:
                             if reading_state.content_index == toc_entries[ntoc + 1].content_index:
@@ -1057,11 +1209,8 @@ class Reader:
                                 )
 
                     elif k in self.keymap.PrevChapter:
-                        ntoc = find_current_content_index(
-                            toc_entries,
-                            text_structure.section_rows,
-                            reading_state.content_index,
-                            reading_state.row,
+                        ntoc = self.find_current_toc_index(
+                            toc_entries, text_structure.section_rows, reading_state
                         )
                         if ntoc > 0:
                             if reading_state.content_index == toc_entries[ntoc - 1].content_index:
@@ -1080,11 +1229,8 @@ class Reader:
                                 )
 
                     elif k in self.keymap.BeginningOfCh:
-                        ntoc = find_current_content_index(
-                            toc_entries,
-                            text_structure.section_rows,
-                            reading_state.content_index,
-                            reading_state.row,
+                        ntoc = self.find_current_toc_index(
+                            toc_entries, text_structure.section_rows, reading_state
                         )
                         try:
                             reading_state = dataclasses.replace(
@@ -1095,11 +1241,8 @@ class Reader:
                             reading_state = dataclasses.replace(reading_state, row=0)
 
                     elif k in self.keymap.EndOfCh:
-                        ntoc = find_current_content_index(
-                            toc_entries,
-                            text_structure.section_rows,
-                            reading_state.content_index,
-                            reading_state.row,
+                        ntoc = self.find_current_toc_index(
+                            toc_entries, text_structure.section_rows, reading_state
                         )
                         try:
                             if (
@@ -1129,11 +1272,8 @@ class Reader:
                                 self.keymap.TableOfContents,
                             )
                             continue
-                        ntoc = find_current_content_index(
-                            toc_entries,
-                            text_structure.section_rows,
-                            reading_state.content_index,
-                            reading_state.row,
+                        ntoc = self.find_current_toc_index(
+                            toc_entries, text_structure.section_rows, reading_state
                         )
                         rettock, fllwd, _ = self.toc(toc_entries, ntoc)
                         if rettock is not None:  # and rettock in WINKEYS:
@@ -1238,17 +1378,16 @@ class Reader:
                             reading_state = ret_object
 
                     elif k in self.keymap.OpenImage and self.image_viewer:
-                        imgs_in_screen = list(
-                            set(
-                                range(reading_state.row, reading_state.row + rows * self.spread + 1)
-                            )
-                            & set(text_structure.image_maps.keys())
-                        )
+                        # rows on screen with image, already in order
+                        imgs_in_screen = [
+                            i
+                            for i in range(reading_state.row, reading_state.row + page_rows + 1)
+                            if i in text_structure.image_maps
+                        ]
                         if not imgs_in_screen:
                             k = NoUpdate()
                             continue
 
-                        imgs_in_screen.sort()
                         image_path: Optional[str] = None
                         if len(imgs_in_screen) == 1:
                             image_path = text_structure.image_maps[imgs_in_screen[0]]
@@ -1362,14 +1501,11 @@ class Reader:
                             )
                             continue
                         else:
-                            retk, idxchoice = self.show_win_choices_bookmarks()
+                            retk, bookmark_to_jump = self.show_win_choices_bookmarks(bookmarks)
                             if retk is not None:
                                 k = retk
                                 continue
-                            elif idxchoice is not None:
-                                bookmark_to_jump = self.state.get_bookmarks(self.ebook)[idxchoice][
-                                    1
-                                ]
+                            elif bookmark_to_jump is not None:
                                 if (
                                     bookmark_to_jump.content_index == reading_state.content_index
                                     and bookmark_to_jump.textwidth == reading_state.textwidth
@@ -1396,9 +1532,7 @@ class Reader:
 
                     elif k in self.keymap.MarkPosition:
                         jumnum = board.getch()
-                        if isinstance(jumnum, Key) and jumnum in tuple(
-                            Key(i) for i in range(48, 58)
-                        ):
+                        if isinstance(jumnum, Key) and jumnum in DIGIT_KEYS:
                             self.jump_list[jumnum.char] = reading_state
                         else:
                             k = NoUpdate()
@@ -1408,7 +1542,7 @@ class Reader:
                         jumnum = board.getch()
                         if (
                             isinstance(jumnum, Key)
-                            and jumnum in tuple(Key(i) for i in range(48, 58))
+                            and jumnum in DIGIT_KEYS
                             and jumnum.char in self.jump_list
                         ):
                             marked_reading_state = self.jump_list[jumnum.char]
@@ -1429,7 +1563,7 @@ class Reader:
 
                     elif k in self.keymap.Library:
                         self.try_assign_letters_count(force_wait=True)
-                        self.calculate_reading_progress(letters_per_content, reading_state)
+                        self.calculate_reading_progress(cumulative_letters, reading_state)
 
                         self.savestate(
                             dataclasses.replace(
@@ -1453,6 +1587,9 @@ class Reader:
                                 return get_ebook_obj(library_items[choice_index].filepath)
 
                     elif k == Key(curses.KEY_RESIZE):
+                        # terminal emits bursts of resize events while being resized
+                        # so only handle the last one of them
+                        self.consume_queued_keys(Key(curses.KEY_RESIZE))
                         self.savestate(
                             dataclasses.replace(
                                 reading_state, rel_pctg=reading_state.row / totlines
@@ -1497,8 +1634,11 @@ class Reader:
                     )
 
                 try:
+                    # erase() rather than clear() so curses only sends what changed
+                    # instead of repainting the whole terminal on every key,
+                    # read() still does a full clear() when (re)entered eg. on resize
                     if self.setting.PageScrollAnimation and self.page_animation:
-                        self.screen.clear()
+                        self.screen.erase()
                         for i in range(1, reading_state.textwidth + 1):
                             curses.napms(1)
                             # self.screen.clear()
@@ -1506,7 +1646,7 @@ class Reader:
                             self.screen.refresh()
                         self.page_animation = None
 
-                    self.screen.clear()
+                    self.screen.erase()
                     self.screen.addstr(0, 0, countstring)
                     board.write(reading_state.row)
 
@@ -1514,7 +1654,7 @@ class Reader:
                     self.try_assign_letters_count()
 
                     # reading progress
-                    self.calculate_reading_progress(letters_per_content, reading_state)
+                    self.calculate_reading_progress(cumulative_letters, reading_state)
 
                     # display reading progress
                     if (
@@ -1543,18 +1683,8 @@ class Reader:
                             k = self.keymap.PageUp[0]
                         else:
                             k = self.keymap.PageDown[0]
-                    elif mouse_event[4] == curses.BUTTON3_CLICKED:
-                        k = self.keymap.TableOfContents[0]
-                    elif mouse_event[4] == curses.BUTTON4_PRESSED:
-                        k = self.keymap.ScrollUp[0]
-                    elif mouse_event[4] == 2097152:
-                        k = self.keymap.ScrollDown[0]
-                    elif mouse_event[4] == curses.BUTTON4_PRESSED + curses.BUTTON_CTRL:
-                        k = self.keymap.Enlarge[0]
-                    elif mouse_event[4] == 2097152 + curses.BUTTON_CTRL:
-                        k = self.keymap.Shrink[0]
-                    elif mouse_event[4] == curses.BUTTON2_CLICKED:
-                        k = self.keymap.TTSToggle[0]
+                    else:
+                        k = self._mouse_keys.get(mouse_event[4], k)
 
                 if checkpoint_row:
                     board.feed_temporary_style()
@@ -1608,3 +1738,4 @@ def start_reading(stdscr, filepath: str):
 
     finally:
         reader.cleanup()
+        state.close()
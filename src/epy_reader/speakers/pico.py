@@ -12,7 +12,10 @@ class SpeakerPico(SpeakerBaseModel):
     available = all([shutil.which(dep) for dep in ["pico2wave", "play"]])
 
     def speak(self, text: str) -> None:
-        _, self.tmp_path = tempfile.mkstemp(suffix=".wav")
+        # pico2wave only writes to a seekable .wav file, so it can't be piped to play,
+        # only its path is needed here
+        fd, self.tmp_path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
 
         try:
             subprocess.run(
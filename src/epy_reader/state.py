@@ -3,7 +3,8 @@ import hashlib
 import os
 import sqlite3
 from datetime import datetime
-from typing import List, Tuple
+from functools import cached_property
+from typing import Iterable, List, Tuple
 
 from epy_reader.ebooks import Ebook
 from epy_reader.models import AppData, LibraryItem, Optional, ReadingState
@@ -16,56 +17,82 @@ class State(AppData):
     """
 
     def __init__(self):
+        self._conn: Optional[sqlite3.Connection] = None
         if not os.path.isfile(self.filepath):
             self.init_db()
+        else:
+            # databases created by older version don't have the index yet
+            self.init_index()
 
-    @property
+    @cached_property
     def filepath(self) -> str:
         return os.path.join(self.prefix, "states.db") if self.prefix else os.devnull
 
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """
+        Single connection opened on first use and reused by every query
+        instead of connecting to the database on every call.
+        Call State.close() when done.
+        """
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.filepath)
+            self._conn.row_factory = sqlite3.Row
+            # WAL with synchronous=NORMAL doesn't fsync on every commit
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
     def get_from_history(self) -> List[LibraryItem]:
-        try:
-            conn = sqlite3.connect(self.filepath)
-            cur = conn.cursor()
-            cur.execute(
-                """
-                SELECT last_read, filepath, title, author, reading_progress
-                FROM library ORDER BY last_read DESC
-                """
-            )
-            results = cur.fetchall()
-            library_items: List[LibraryItem] = []
-            for result in results:
-                library_items.append(
-                    LibraryItem(
-                        last_read=datetime.fromisoformat(result[0]),
-                        filepath=result[1],
-                        title=result[2],
-                        author=result[3],
-                        reading_progress=result[4],
-                    )
+        cur = self.conn.cursor()
+        cur.execute(
+            """
+            SELECT last_read, filepath, title, author, reading_progress
+            FROM library ORDER BY last_read DESC
+            """
+        )
+        results = cur.fetchall()
+        library_items: List[LibraryItem] = []
+        for result in results:
+            library_items.append(
+                LibraryItem(
+                    last_read=datetime.fromisoformat(result[0]),
+                    filepath=result[1],
+                    title=result[2],
+                    author=result[3],
+                    reading_progress=result[4],
                 )
-            return library_items
-        finally:
-            conn.close()
+            )
+        return library_items
 
     def delete_from_library(self, filepath: str) -> None:
+        self.delete_many_from_library([filepath])
+
+    def delete_many_from_library(self, filepaths: Iterable[str]) -> None:
+        """Delete all of `filepaths` in a single transaction"""
+        # foreign keys are only enforced here to cascade the delete,
+        # turned back off since the connection is reused
+        self.conn.execute("PRAGMA foreign_keys = ON")
         try:
-            conn = sqlite3.connect(self.filepath)
-            conn.execute("PRAGMA foreign_keys = ON")
-            conn.execute("DELETE FROM reading_states WHERE filepath=?", (filepath,))
-            conn.commit()
+            with self.conn as conn:
+                conn.executemany(
+                    "DELETE FROM reading_states WHERE filepath=?", ((i,) for i in filepaths)
+                )
         finally:
-            conn.close()
+            self.conn.execute("PRAGMA foreign_keys = OFF")
 
     def get_last_read(self) -> Optional[str]:
         library = self.get_from_history()
         return library[0].filepath if library else None
 
     def update_library(self, ebook: Ebook, reading_progress: Optional[float]) -> None:
-        try:
-            metadata = ebook.get_meta()
-            conn = sqlite3.connect(self.filepath)
+        metadata = ebook.get_meta()
+        with self.conn as conn:
             conn.execute(
                 """
                 INSERT OR REPLACE INTO library (filepath, title, author, reading_progress)
@@ -73,28 +100,19 @@ class State(AppData):
                 """,
                 (ebook.path, metadata.title, metadata.creator, reading_progress),
             )
-            conn.commit()
-        finally:
-            conn.close()
 
     def get_last_reading_state(self, ebook: Ebook) -> ReadingState:
-        try:
-            conn = sqlite3.connect(self.filepath)
-            conn.row_factory = sqlite3.Row
-            cur = conn.cursor()
-            cur.execute("SELECT * FROM reading_states WHERE filepath=?", (ebook.path,))
-            result = cur.fetchone()
-            if result:
-                result = dict(result)
-                del result["filepath"]
-                return ReadingState(**result, section=None)
-            return ReadingState(content_index=0, textwidth=80, row=0, rel_pctg=None, section=None)
-        finally:
-            conn.close()
+        cur = self.conn.cursor()
+        cur.execute("SELECT * FROM reading_states WHERE filepath=?", (ebook.path,))
+        result = cur.fetchone()
+        if result:
+            result = dict(result)
+            del result["filepath"]
+            return ReadingState(**result, section=None)
+        return ReadingState(content_index=0, textwidth=80, row=0, rel_pctg=None, section=None)
 
     def set_last_reading_state(self, ebook: Ebook, reading_state: ReadingState) -> None:
-        try:
-            conn = sqlite3.connect(self.filepath)
+        with self.conn as conn:
             conn.execute(
                 """
                 INSERT OR REPLACE INTO reading_states
@@ -102,13 +120,9 @@ class State(AppData):
                 """,
                 {"filepath": ebook.path, **dataclasses.asdict(reading_state)},
             )
-            conn.commit()
-        finally:
-            conn.close()
 
     def insert_bookmark(self, ebook: Ebook, name: str, reading_state: ReadingState) -> None:
-        try:
-            conn = sqlite3.connect(self.filepath)
+        with self.conn as conn:
             conn.execute(
                 """
                 INSERT INTO bookmarks
@@ -121,42 +135,38 @@ class State(AppData):
                     **dataclasses.asdict(reading_state),
                 },
             )
-            conn.commit()
-        finally:
-            conn.close()
 
     def delete_bookmark(self, ebook: Ebook, name: str) -> None:
-        try:
-            conn = sqlite3.connect(self.filepath)
+        with self.conn as conn:
             conn.execute("DELETE FROM bookmarks WHERE filepath=? AND name=?", (ebook.path, name))
-            conn.commit()
-        finally:
-            conn.close()
 
     def get_bookmarks(self, ebook: Ebook) -> List[Tuple[str, ReadingState]]:
-        try:
-            conn = sqlite3.connect(self.filepath)
-            conn.row_factory = sqlite3.Row
-            cur = conn.cursor()
-            cur.execute("SELECT * FROM bookmarks WHERE filepath=?", (ebook.path,))
-            results = cur.fetchall()
-            bookmarks: List[Tuple[str, ReadingState]] = []
-            for result in results:
-                tmp_dict = dict(result)
-                name = tmp_dict["name"]
-                tmp_dict = {
-                    k: v
-                    for k, v in tmp_dict.items()
-                    if k in ("content_index", "textwidth", "row", "rel_pctg")
-                }
-                bookmarks.append((name, ReadingState(**tmp_dict)))
-            return bookmarks
-        finally:
-            conn.close()
+        cur = self.conn.cursor()
+        cur.execute(
+            """
+            SELECT name, content_index, textwidth, row, rel_pctg
+            FROM bookmarks WHERE filepath=?
+            """,
+            (ebook.path,),
+        )
+        results = cur.fetchall()
+        bookmarks: List[Tuple[str, ReadingState]] = []
+        for result in results:
+            bookmarks.append(
+                (
+                    result["name"],
+                    ReadingState(
+                        content_index=result["content_index"],
+                        textwidth=result["textwidth"],
+                        row=result["row"],
+                        rel_pctg=result["rel_pctg"],
+                    ),
+                )
+            )
+        return bookmarks
 
     def init_db(self) -> None:
-        try:
-            conn = sqlite3.connect(self.filepath)
+        with self.conn as conn:
             conn.executescript(
                 """
                 CREATE TABLE reading_states (
@@ -190,6 +200,9 @@ class State(AppData):
                 );
                 """
             )
-            conn.commit()
-        finally:
-            conn.close()
+        self.init_index()
+
+    def init_index(self) -> None:
+        # bookmarks are always looked up by filepath
+        with self.conn as conn:
+            conn.execute("CREATE INDEX IF NOT EXISTS bookmarks_filepath ON bookmarks (filepath)")
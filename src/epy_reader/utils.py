@@ -1,18 +1,26 @@
+import bisect
 import curses
+import itertools
 import os
-import re
+import pickle
+import signal
 import sys
 import textwrap
-from functools import wraps
+import xml.etree.ElementTree as ET
+from functools import lru_cache, wraps
 from typing import List, Mapping, Optional, Sequence, Tuple, Union
 
 from epy_reader.ebooks import URL, Azw, Ebook, Epub, FictionBook, Mobi
-from epy_reader.lib import is_url, tuple_subtract
+from epy_reader.lib import count_non_whitespace, is_url, tuple_subtract
 from epy_reader.models import Key, LettersCount, NoUpdate, ReadingState, TextStructure, TocEntry
-from epy_reader.parser import parse_html
+from epy_reader.parser import HTMLtoLines, parse_html
 from epy_reader.speakers import SpeakerBaseModel, SpeakerMimic, SpeakerPico, SpeakerGttsMPV
 
 
+# numeral keys, used for count prefix and jump marks
+DIGIT_KEYS = frozenset(Key(i) for i in range(48, 58))
+
+
 def get_ebook_obj(filepath: str) -> Ebook:
     file_ext = os.path.splitext(filepath)[1].lower()
     if is_url(filepath):
@@ -37,14 +45,29 @@ def safe_curs_set(state: int) -> None:
 
 
 def find_current_content_index(
-    toc_entries: Tuple[TocEntry, ...], toc_secid: Mapping[str, int], index: int, y: int
+    toc_entries: Tuple[TocEntry, ...],
+    toc_secid: Mapping[str, int],
+    index: int,
+    y: int,
+    content_indices: Optional[Sequence[int]] = None,
 ) -> int:
-    ntoc = 0
-    for n, toc_entry in enumerate(toc_entries):
-        if toc_entry.content_index <= index:
-            if y >= toc_secid.get(toc_entry.section, 0):  # type: ignore
-                ntoc = n
-    return ntoc
+    """
+    :param content_indices: content_index of every toc entries, only if it's sorted
+                            so the last entry at or before `index` can be bisected
+    """
+    if content_indices is None:
+        ntoc = 0
+        for n, toc_entry in enumerate(toc_entries):
+            if toc_entry.content_index <= index:
+                if y >= toc_secid.get(toc_entry.section, 0):  # type: ignore
+                    ntoc = n
+        return ntoc
+
+    # walk back from the last entry at or before `index` to the one `y` is past
+    for n in range(bisect.bisect_right(content_indices, index) - 1, -1, -1):
+        if y >= toc_secid.get(toc_entries[n].section, 0):  # type: ignore
+            return n
+    return 0
 
 
 def pgup(current_row: int, window_height: int, counter: int = 1) -> int:
@@ -64,6 +87,17 @@ def pgdn(current_row: int, total_lines: int, window_height: int, counter: int =
         return current_row
 
 
+def merge_queued_scrolls(queued: int, room: int) -> Tuple[int, bool]:
+    """
+    Split `queued` repeats of a line scroll key into
+    rows to scroll at once, at most `room` rows left before reaching content boundary,
+    and whether one repeat should be put back to input queue to cross the boundary.
+    Repeats beyond that one are dropped.
+    """
+    room = max(room, 0)
+    return min(queued, room), queued > room
+
+
 def pgend(total_lines: int, window_height: int) -> int:
     if total_lines - window_height >= 0:
         return total_lines - window_height
@@ -126,20 +160,27 @@ def choice_win(allowdel=False):
                 pad.addstr(n, 0, strs)
                 span.append(len(strs))
 
+            bkgd = pad.getbkgd()
+            prev_index: Optional[int] = None
             countstring = ""
-            while key_chwin not in self.keymap.Quit + key:
+            # key sets checked on every keypress, built once per window
+            exit_keys = frozenset(self.keymap.Quit + key)
+            up_keys = frozenset(self.keymap.ScrollUp + self.keymap.PageUp)
+            down_keys = frozenset(self.keymap.ScrollDown + self.keymap.PageDown)
+            other_win_keys = frozenset(tuple_subtract(self._win_keys, key))
+            while key_chwin not in exit_keys:
                 if countstring == "":
                     count = 1
                 else:
                     count = int(countstring)
-                if key_chwin in tuple(Key(i) for i in range(48, 58)):  # i.e., k is a numeral
+                if key_chwin in DIGIT_KEYS:
                     countstring = countstring + key_chwin.char
                 else:
-                    if key_chwin in self.keymap.ScrollUp + self.keymap.PageUp:
+                    if key_chwin in up_keys:
                         index -= count
                         if index < 0:
                             index = 0
-                    elif key_chwin in self.keymap.ScrollDown or key_chwin in self.keymap.PageDown:
+                    elif key_chwin in down_keys:
                         index += count
                         if index + 1 >= totlines:
                             index = totlines - 1
@@ -177,7 +218,7 @@ def choice_win(allowdel=False):
                             return None, 0, None
                         else:
                             return None, 1, None
-                    elif key_chwin in tuple_subtract(self._win_keys, key):
+                    elif key_chwin in other_win_keys:
                         chwin.clear()
                         chwin.refresh()
                         return key_chwin, index, None
@@ -189,15 +230,18 @@ def choice_win(allowdel=False):
                     else:
                         y += 1
 
-                for n in range(totlines):
-                    att = curses.A_REVERSE if index == n else curses.A_NORMAL
-                    pre = ">>" if index == n else "  "
-                    pad.addstr(n, 0, pre)
-                    pad.chgat(n, 0, span[n], pad.getbkgd() | att)
+                # only rows whose highlight changed need to be redrawn
+                if index != prev_index:
+                    if prev_index is not None:
+                        pad.addstr(prev_index, 0, "  ")
+                        pad.chgat(prev_index, 0, span[prev_index], bkgd | curses.A_NORMAL)
+                    pad.addstr(index, 0, ">>")
+                    pad.chgat(index, 0, span[index], bkgd | curses.A_REVERSE)
+                    prev_index = index
 
                 pad.refresh(y, 0, Y + 4 + (1 if allowdel else 0), X + 4, rows - 5, cols - 6)
                 # pad.refresh(y, 0, Y+5, X+4, rows - 5, cols - 6)
-                key_chwin = Key(chwin.getch())
+                key_chwin = Key.from_int(chwin.getch())
                 if key_chwin == Key(curses.KEY_MOUSE):
                     mouse_event = curses.getmouse()
                     if mouse_event[4] == curses.BUTTON4_PRESSED:
@@ -234,6 +278,18 @@ def choice_win(allowdel=False):
     return inner_f
 
 
+@lru_cache(maxsize=8)
+def wrap_text_win_lines(raw_texts: str, width: int) -> Tuple[str, ...]:
+    """
+    Cached since the same help/metadata text gets reopened
+    with the same width most of the time
+    """
+    texts: List[str] = []
+    for i in raw_texts.splitlines():
+        texts += textwrap.wrap(i, width, drop_whitespace=False)
+    return tuple(texts)
+
+
 def text_win(textfunc):
     @wraps(textfunc)
     def wrapper(self, *args, **kwargs) -> Union[NoUpdate, Key]:
@@ -249,9 +305,7 @@ def text_win(textfunc):
         if len(title) > cols - 8:
             title = title[: cols - 8]
 
-        texts = []
-        for i in raw_texts.splitlines():
-            texts += textwrap.wrap(i, wi - 6, drop_whitespace=False)
+        texts = wrap_text_win_lines(raw_texts, wi - 6)
 
         textw.box()
         textw.keypad(True)
@@ -266,14 +320,22 @@ def text_win(textfunc):
             pad.bkgd(self.screen.getbkgd())
 
         pad.keypad(True)
-        for n, i in enumerate(texts):
-            pad.addstr(n, 0, i)
+        # lines are narrower than the pad, so write them all at once
+        try:
+            pad.addstr(0, 0, "\n".join(texts))
+        except curses.error:
+            pad.erase()
+            for n, i in enumerate(texts):
+                pad.addstr(n, 0, i)
         y = 0
         textw.refresh()
         pad.refresh(y, 0, Y + 4, X + 4, rows - 5, cols - 6)
         padhi = rows - 8 - Y
 
-        while key_textw not in self.keymap.Quit + key:
+        # key sets checked on every keypress, built once per window
+        exit_keys = frozenset(self.keymap.Quit + key)
+        other_win_keys = frozenset(tuple_subtract(self._win_keys, key))
+        while key_textw not in exit_keys:
             if key_textw in self.keymap.ScrollUp and y > 0:
                 y -= 1
             elif key_textw in self.keymap.ScrollDown and y < totlines - hi + 6:
@@ -286,12 +348,12 @@ def text_win(textfunc):
                 y = 0
             elif key_textw in self.keymap.EndOfCh:
                 y = pgend(totlines, padhi)
-            elif key_textw in tuple_subtract(self._win_keys, key):
+            elif key_textw in other_win_keys:
                 textw.clear()
                 textw.refresh()
                 return key_textw
             pad.refresh(y, 0, 6, 5, rows - 5, cols - 5)
-            key_textw = Key(textw.getch())
+            key_textw = Key.from_int(textw.getch())
 
         textw.clear()
         textw.refresh()
@@ -345,23 +407,55 @@ def construct_relative_reading_state(
     )
 
 
+def count_content_letters(
+    ebook: Ebook, content: Union[str, ET.Element], parser: Optional[HTMLtoLines] = None
+) -> int:
+    src_lines = parse_html(ebook.get_raw_text(content), parser=parser)
+    assert isinstance(src_lines, tuple)
+    # count the whole content at once rather than line by line
+    return count_non_whitespace("".join(src_lines))
+
+
+def construct_letters_count(per_content_counts: Sequence[int]) -> LettersCount:
+    return LettersCount(
+        all=sum(per_content_counts),
+        cumulative=tuple(itertools.accumulate(per_content_counts, initial=0))[:-1],
+    )
+
+
 def count_letters(ebook: Ebook) -> LettersCount:
-    per_content_counts: List[int] = []
-    cumulative_counts: List[int] = []
     # assert isinstance(ebook.contents, tuple)
-    for i in ebook.contents:
-        content = ebook.get_raw_text(i)
-        src_lines = parse_html(content)
-        assert isinstance(src_lines, tuple)
-        cumulative_counts.append(sum(per_content_counts))
-        per_content_counts.append(sum([len(re.sub(r"\s", "", j)) for j in src_lines]))
+    parser = HTMLtoLines()
+    return construct_letters_count(
+        [count_content_letters(ebook, i, parser) for i in ebook.contents]
+    )
+
 
-    return LettersCount(all=sum(per_content_counts), cumulative=tuple(cumulative_counts))
+# ebook and parser owned by each of letters counting worker processes
+_worker_ebook: Optional[Ebook] = None
+_worker_parser: Optional[HTMLtoLines] = None
 
 
-def count_letters_parallel(ebook: Ebook, child_conn) -> None:
-    child_conn.send(count_letters(ebook))
-    child_conn.close()
+def init_counting_letters_worker(pickled_ebook: bytes) -> None:
+    """
+    Initializer of letters counting worker processes.
+    Ebook is passed pickled so every worker opens its own copy of the book file
+    instead of sharing the parent's (forked) file handle, which caused
+    zlib.error: Error -3 while decompressing data: invalid distance too far back
+    """
+    global _worker_ebook, _worker_parser
+    # exiting is handled by the pool, not by the parent's signal handlers
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_ebook = pickle.loads(pickled_ebook)
+    _worker_parser = HTMLtoLines()
+
+
+def count_content_letters_in_worker(content_index: int) -> int:
+    assert _worker_ebook is not None
+    return count_content_letters(
+        _worker_ebook, _worker_ebook.contents[content_index], _worker_parser
+    )
 
 
 def construct_speaker(
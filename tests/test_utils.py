@@ -1,6 +1,9 @@
+import random
 from collections import namedtuple
 
-from epy_reader.lib import resolve_path
+from epy_reader.lib import count_non_whitespace, resolve_path, tuple_subtract
+from epy_reader.models import Key, TocEntry
+from epy_reader.utils import find_current_content_index, merge_queued_scrolls
 
 
 def test_resolve_path():
@@ -20,3 +23,42 @@ def test_resolve_path():
 
     for input, expected in zip(inputs, expecteds):
         assert resolve_path(input.current_dir, input.relative_path) == expected
+
+
+def test_count_non_whitespace():
+    assert count_non_whitespace("") == 0
+    assert count_non_whitespace("  \n\t ") == 0
+    assert count_non_whitespace("Lorem ipsum\n dolor\u00a0sit") == 18
+
+
+def test_tuple_subtract():
+    assert tuple_subtract((1, 2, 3, 2), (2, 4)) == (1, 3)
+    assert tuple_subtract((Key("a"), Key("b")), (Key("b"),)) == (Key("a"),)
+
+
+def test_find_current_content_index_bisect():
+    random.seed(0)
+    for _ in range(200):
+        content_indices = sorted(random.choices(range(10), k=random.randint(1, 20)))
+        toc_entries = tuple(
+            TocEntry(label=str(n), content_index=i, section=random.choice([None, "a", "b"]))
+            for n, i in enumerate(content_indices)
+        )
+        section_rows = {"a": random.randint(0, 50), "b": random.randint(0, 50)}
+        for index in range(11):
+            for y in range(0, 60, 7):
+                assert find_current_content_index(
+                    toc_entries, section_rows, index, y, content_indices
+                ) == find_current_content_index(toc_entries, section_rows, index, y)
+
+
+def test_merge_queued_scrolls():
+    assert merge_queued_scrolls(0, 5) == (0, False)
+    assert merge_queued_scrolls(3, 5) == (3, False)
+    assert merge_queued_scrolls(5, 5) == (5, False)
+    assert merge_queued_scrolls(7, 5) == (5, True)
+    # at content boundary or in content shorter than screen
+    assert merge_queued_scrolls(0, 0) == (0, False)
+    assert merge_queued_scrolls(0, -3) == (0, False)
+    assert merge_queued_scrolls(2, 0) == (0, True)
+    assert merge_queued_scrolls(2, -3) == (0, True)